@@ -0,0 +1,132 @@
+/*
+ * C implementation of wordle.build_hint_table. Build in place with
+ *
+ *     python setup.py build_ext --inplace
+ *
+ * and wordle.py will use it instead of Numba or NumPy.
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#include <stdint.h>
+#include <stdlib.h>
+
+#define WORD_LENGTH 5
+#define ALPHABET 26
+
+/*
+ * words: n * WORD_LENGTH letter codes (a=0 ... z=25).
+ * out: n * n packed hints, out[actual * n + guess].
+ *
+ * Uses the same letter position masks as wordle.hint_codes: a non-green
+ * guessed letter is yellow when the actual word has more non-green copies of
+ * it than there are non-green copies earlier in the guess.
+ */
+static int compute_hint_matrix(const uint8_t *words, Py_ssize_t n, uint8_t *out)
+{
+    uint8_t *masks = calloc((size_t)n * ALPHABET, 1);
+    if (masks == NULL) {
+        return -1;
+    }
+    for (Py_ssize_t w = 0; w < n; w++) {
+        for (int i = 0; i < WORD_LENGTH; i++) {
+            masks[w * ALPHABET + words[w * WORD_LENGTH + i]] |= 1 << i;
+        }
+    }
+
+    for (Py_ssize_t a = 0; a < n; a++) {
+        const uint8_t *actual = words + a * WORD_LENGTH;
+        const uint8_t *actual_masks = masks + a * ALPHABET;
+        for (Py_ssize_t g = 0; g < n; g++) {
+            const uint8_t *guess = words + g * WORD_LENGTH;
+            const uint8_t *guess_masks = masks + g * ALPHABET;
+            unsigned green = 0;
+            for (int i = 0; i < WORD_LENGTH; i++) {
+                green |= (unsigned)(actual[i] == guess[i]) << i;
+            }
+            unsigned not_green = ~green;
+
+            uint8_t code = 0;
+            for (int i = 0; i < WORD_LENGTH; i++) {
+                code *= 3;
+                if (green & (1u << i)) {
+                    continue;
+                }
+                uint8_t letter = guess[i];
+                int available = __builtin_popcount(actual_masks[letter] & not_green);
+                int earlier = __builtin_popcount(guess_masks[letter] & not_green & ((1u << i) - 1));
+                code += available > earlier ? 1 : 2;
+            }
+            out[a * n + g] = code;
+        }
+    }
+
+    free(masks);
+    return 0;
+}
+
+/* compute_hint_matrix indexes its masks by letter code. */
+static int letters_in_range(const uint8_t *words, Py_ssize_t len)
+{
+    for (Py_ssize_t i = 0; i < len; i++) {
+        if (words[i] >= ALPHABET) {
+            return 0;
+        }
+    }
+    return 1;
+}
+
+static PyObject *hint_ext_compute_hint_matrix(PyObject *self, PyObject *args)
+{
+    Py_buffer words, out;
+    if (!PyArg_ParseTuple(args, "y*w*", &words, &out)) {
+        return NULL;
+    }
+
+    PyObject *result = NULL;
+    Py_ssize_t n = words.len / WORD_LENGTH;
+    if (words.len % WORD_LENGTH != 0) {
+        PyErr_SetString(PyExc_ValueError, "words must be a multiple of 5 bytes long");
+    } else if (out.len != n * n) {
+        PyErr_SetString(PyExc_ValueError, "out must hold one byte per (actual, guess) pair");
+    } else if (!letters_in_range(words.buf, words.len)) {
+        PyErr_SetString(PyExc_ValueError, "letter codes must be below 26");
+    } else {
+        int err;
+        Py_BEGIN_ALLOW_THREADS
+        err = compute_hint_matrix(words.buf, n, out.buf);
+        Py_END_ALLOW_THREADS
+        if (err) {
+            PyErr_NoMemory();
+        } else {
+            result = Py_None;
+            Py_INCREF(result);
+        }
+    }
+
+    PyBuffer_Release(&words);
+    PyBuffer_Release(&out);
+    return result;
+}
+
+static PyMethodDef hint_ext_methods[] = {
+    {"compute_hint_matrix", hint_ext_compute_hint_matrix, METH_VARARGS,
+     "compute_hint_matrix(words, out)\n\n"
+     "Fills the writable buffer out (n * n bytes) with packed hints for the\n"
+     "n 5-letter words encoded as letter codes in words (n * 5 bytes)."},
+    {NULL, NULL, 0, NULL},
+};
+
+static struct PyModuleDef hint_ext_module = {
+    PyModuleDef_HEAD_INIT,
+    "hint_ext",
+    "C kernel for building wordle's hint table.",
+    -1,
+    hint_ext_methods,
+};
+
+PyMODINIT_FUNC PyInit_hint_ext(void)
+{
+    return PyModule_Create(&hint_ext_module);
+}
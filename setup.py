@@ -0,0 +1,14 @@
+from setuptools import Extension, setup
+
+# Only builds the optional C hint table kernel; wordle.py itself is run as a
+# script. Build with: python setup.py build_ext --inplace
+setup(
+    name='wordle-hint-ext',
+    ext_modules=[
+        Extension(
+            'hint_ext',
+            sources=['hint_ext.c'],
+            extra_compile_args=['-O3', '-march=native', '-funroll-loops'],
+        ),
+    ],
+)
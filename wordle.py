@@ -2,13 +2,42 @@
 
 import argparse
 import collections
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from enum import Enum
-from fractions import Fraction
 import math
+import multiprocessing
+from multiprocessing import shared_memory
+import os
 import pathlib
 import time
 from typing import List, Tuple, Dict, Set, Optional
 
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+try:
+    import cupy
+except ImportError:
+    cupy = None
+
+if cupy is not None:
+    # CuPy imports fine on machines without a usable GPU, so check for a
+    # device up front and use the CPU code paths when there isn't one.
+    try:
+        if cupy.cuda.runtime.getDeviceCount() == 0:
+            cupy = None
+    except Exception:
+        cupy = None
+
+try:
+    import hint_ext
+except ImportError:
+    hint_ext = None
+
 parser = argparse.ArgumentParser(description='Wordle solver')
 parser.add_argument(
     '--dictionary',
@@ -37,83 +66,420 @@ parser.add_argument(
     default=1,
 )
 
+parser.add_argument(
+    '--deepen',
+    help="""
+    Before the full search, search 1 to N guesses deep to find good guesses
+    to try first (0 to disable)
+    """,
+    type=int,
+    default=0,
+)
+
+parser.add_argument(
+    '--tabled',
+    help='Solve every reachable state bottom-up instead of searching recursively',
+    action='store_true',
+)
+
+parser.add_argument(
+    '--workers',
+    help='Number of processes to evaluate first-level guesses with',
+    type=int,
+    default=os.cpu_count() or 1,
+)
+
+# Hint pieces are plain ints so hints are cheap to build and compare. They're
+# also the base-3 digits of packed hints (see encode_hint).
+GREEN = 0
+YELLOW = 1
+GRAY = 2
+
 class HintPiece(Enum):
-    GREEN = 'GREEN'
-    YELLOW = 'YELLOW'
-    GRAY = 'GRAY'
+    """Display form of a hint piece, for printing decoded hints."""
+    GREEN = GREEN
+    YELLOW = YELLOW
+    GRAY = GRAY
 
     def __repr__(self):
-        return self.value
-
-# I don't know how to manage namespaces cleanly.
-GREEN = HintPiece.GREEN
-YELLOW = HintPiece.YELLOW
-GRAY = HintPiece.GRAY
-
-def brief_hint_piece(hint_piece: HintPiece) -> str:
-    if hint_piece == GREEN:
-        return 'G'
-    elif hint_piece == YELLOW:
-        return 'Y'
-    elif hint_piece == GRAY:
-        return 'R'
-    else:
-        raise ValueError('Unknown hint piece: {}'.format(hint_piece))
+        return self.name
+
+def brief_hint_piece(hint_piece: int) -> str:
+    return 'GYR'[hint_piece]
+
+# Hints are packed into base-3 integers, first tile most significant, so a
+# whole 5-tile hint fits in a uint8 (3**5 == 243) and compares as an int.
+def encode_hint(hint: Tuple[int]) -> int:
+    """Packs a hint into a single integer.
+
+    >>> encode_hint((GREEN, GREEN, GREEN, GREEN, GREEN))
+    0
+    >>> encode_hint((GRAY, GRAY, GRAY, GRAY, YELLOW))
+    241
+    """
+    code = 0
+    for piece in hint:
+        code = code * 3 + piece
+    return code
+
+def hint_pieces(code: int, length: int = 5) -> Tuple[int]:
+    """Inverse of encode_hint.
+
+    >>> hint_pieces(241)
+    (2, 2, 2, 2, 1)
+    """
+    out = []
+    for _ in range(length):
+        code, piece = divmod(code, 3)
+        out.append(piece)
+    return tuple(reversed(out))
+
+def decode_hint(code: int, length: int = 5) -> Tuple[HintPiece]:
+    """hint_pieces, for display.
+
+    >>> decode_hint(241)
+    (GRAY, GRAY, GRAY, GRAY, YELLOW)
+    """
+    return tuple(map(HintPiece, hint_pieces(code, length)))
+
+ALL_GREEN = 0
+HINT_DECODE = tuple(hint_pieces(code) for code in range(3 ** 5))
 
-def brief_hint(hint: Tuple[HintPiece]) -> str:
-    return ''.join(brief_hint_piece(h) for h in hint)
+def brief_hint(hint: int) -> str:
+    """
+    >>> brief_hint(241)
+    'RRRRY'
+    """
+    return ''.join(brief_hint_piece(h) for h in HINT_DECODE[hint])
 
-ALL_GREEN = (GREEN, GREEN, GREEN, GREEN, GREEN)
+def is_lowercase_word(word: str) -> bool:
+    return word.isascii() and word.isalpha() and word.islower()
 
 def hint(actual, guess):
-    """Returns the hint for the word guessed.
+    """Returns the packed hint for the word guessed.
 
-    >>> hint('abcd', 'abcd')
+    >>> hint('abcde', 'abcde') == ALL_GREEN
+    True
+    >>> decode_hint(hint('abcd', 'abcd'), 4)
     (GREEN, GREEN, GREEN, GREEN)
-    >>> hint('abcd', 'dcba')
+    >>> decode_hint(hint('abcd', 'dcba'), 4)
     (YELLOW, YELLOW, YELLOW, YELLOW)
-    >>> hint('abcde', 'edcba')
+    >>> decode_hint(hint('abcde', 'edcba'))
     (YELLOW, YELLOW, GREEN, YELLOW, YELLOW)
-    >>> hint('xxxxx', 'bacon')
+    >>> decode_hint(hint('xxxxx', 'bacon'))
     (GRAY, GRAY, GRAY, GRAY, GRAY)
-    >>> hint('xaaax', 'xxaaa')
+    >>> decode_hint(hint('xaaax', 'xxaaa'))
     (GREEN, YELLOW, GREEN, GREEN, YELLOW)
-    >>> hint('aabbc', 'bbxxa')
+    >>> decode_hint(hint('aabbc', 'bbxxa'))
     (YELLOW, YELLOW, GRAY, GRAY, YELLOW)
-    >>> hint('bbxxa', 'aabbc')
+    >>> decode_hint(hint('bbxxa', 'aabbc'))
     (YELLOW, GRAY, YELLOW, YELLOW, GRAY)
-    >>> hint('abaci','bacon')
+    >>> decode_hint(hint('abaci','bacon'))
     (YELLOW, YELLOW, YELLOW, GRAY, GRAY)
-    >>> hint('bacon', 'abaci')
+    >>> decode_hint(hint('bacon', 'abaci'))
     (YELLOW, YELLOW, GRAY, YELLOW, GRAY)
+    >>> hint('Zx', 'ty')
+    Traceback (most recent call last):
+        ...
+    ValueError: Not a word of a-z: 'Zx'
     """
     if len(actual) != len(guess):
         raise ValueError('Word lengths must match')
-
-    floating_letter_counts = collections.Counter(actual)
+    for word in (actual, guess):
+        if not is_lowercase_word(word):
+            raise ValueError(f'Not a word of a-z: {word!r}')
+
+    # Indexed by letter (a=0 ... z=25); counts the letters of `actual` that
+    # aren't matched by a green tile.
+    floating_letter_counts = bytearray(26)
+    actual = actual.encode('ascii')
+    guess = guess.encode('ascii')
     for ac, gc in zip(actual, guess):
-        if ac == gc:
-            floating_letter_counts[ac] -= 1
+        if ac != gc:
+            floating_letter_counts[ac - 97] += 1
 
     out = []
     for ac, gc in zip(actual, guess):
         if ac == gc:
             out.append(GREEN)
-        elif floating_letter_counts[gc] > 0:
+        elif floating_letter_counts[gc - 97] > 0:
             out.append(YELLOW)
-            floating_letter_counts[gc] -= 1
+            floating_letter_counts[gc - 97] -= 1
         else:
             out.append(GRAY)
 
-    return tuple(out)
+    return encode_hint(out)
+
+def array_module(x):
+    """numpy, or cupy for arrays that live on the GPU."""
+    if cupy is None:
+        return np
+    return cupy.get_array_module(x)
+
+def encode_words(words) -> np.ndarray:
+    """Returns an (N, 5) uint8 array of letter codes (a=0 ... z=25).
+
+    The table builders index by letter code without bounds checks, so words
+    are checked here.
+
+    >>> encode_words(['abcde', 'xyzzy']).tolist()
+    [[0, 1, 2, 3, 4], [23, 24, 25, 25, 24]]
+    >>> encode_words(['Abcde'])
+    Traceback (most recent call last):
+        ...
+    ValueError: Not a 5-letter word of a-z: 'Abcde'
+    """
+    for word in words:
+        if not (len(word) == 5 and is_lowercase_word(word)):
+            raise ValueError(f'Not a 5-letter word of a-z: {word!r}')
+    return (
+        np.frombuffer(''.join(words).encode('ascii'), dtype=np.uint8)
+        .reshape(len(words), -1) - ord('a'))
+
+# Like HINT_TABLE_CHUNK, for build_hint_table_gpu, where only device memory
+# limits the chunk size.
+HINT_TABLE_GPU_CHUNK = 2048
+
+# Number of actual words handled per vectorized step of build_hint_table. Each
+# scratch array is chunk * N bytes, and larger chunks than this fall out of
+# cache.
+HINT_TABLE_CHUNK = 256
+
+def build_hint_table(words) -> np.ndarray:
+    """Returns an N x N uint8 matrix whose [i, j] entry is the packed hint for
+    guessing words[j] when the answer is words[i].
+
+    Uses the GPU if CuPy is installed, then the hint_ext C extension if it's
+    been built, then Numba if that's installed, and falls back to plain NumPy
+    otherwise.
+
+    >>> words = ['abaci', 'bacon', 'xaaax', 'xxaaa', 'aabbc', 'bbxxa']
+    >>> table = build_hint_table(words)
+    >>> all(table[i, j] == hint(a, g)
+    ...     for i, a in enumerate(words) for j, g in enumerate(words))
+    True
+    >>> np.array_equal(build_hint_table_numpy(words), table)
+    True
+    >>> numba is None or np.array_equal(build_hint_matrix(encode_words(words)), table)
+    True
+    >>> hint_ext is None or np.array_equal(build_hint_table_c(words), table)
+    True
+    """
+    if cupy is not None:
+        return build_hint_table_gpu(words)
+    if hint_ext is not None:
+        return build_hint_table_c(words)
+    if numba is not None:
+        return build_hint_matrix(encode_words(words))
+    return build_hint_table_numpy(words)
+
+def build_hint_table_c(words) -> np.ndarray:
+    encoded = np.ascontiguousarray(encode_words(words))
+    table = np.empty((len(words), len(words)), dtype=np.uint8)
+    hint_ext.compute_hint_matrix(encoded, table)
+    return table
+
+def letter_position_masks(encoded: np.ndarray) -> np.ndarray:
+    """Returns an (N, 26) uint8 array whose [w, letter] entry has bit i set
+    when encoded word w has that letter at position i.
+
+    >>> letter_position_masks(encode_words(['aabca']))[0, :3].tolist()
+    [19, 4, 8]
+    """
+    xp = array_module(encoded)
+    n, length = encoded.shape
+    masks = xp.zeros((n, 26), dtype=np.uint8)
+    for pos in range(length):
+        masks[xp.arange(n), encoded[:, pos]] |= np.uint8(1 << pos)
+    return masks
+
+# Letter position masks only use the low 5 bits.
+POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(32)], dtype=np.uint8)
+
+def popcount(x: np.ndarray) -> np.ndarray:
+    xp = array_module(x)
+    if hasattr(xp, 'bitwise_count'):  # NumPy 2.0+
+        return xp.bitwise_count(x)
+    return xp.asarray(POPCOUNT_TABLE)[x]
+
+def hint_codes(actual: np.ndarray, guesses: np.ndarray) -> np.ndarray:
+    """Packed hints for every guess in an (N, 5) array of letter codes.
+
+    `actual` is a single (5,) encoded word, giving an (N,) result, or a (C, 5)
+    batch of them, giving (C, N). Every step is a whole-array NumPy operation;
+    letter counts come from popcounts of letter_position_masks.
+
+    >>> words = ['abaci', 'bacon', 'xaaax', 'xxaaa']
+    >>> hint_codes(encode_words(words)[1], encode_words(words)).tolist() == [hint('bacon', g) for g in words]
+    True
+    """
+    xp = array_module(guesses)
+    single = actual.ndim == 1
+    actual = xp.atleast_2d(actual)
+    c, length = actual.shape
+    n = len(guesses)
+    actual_masks = letter_position_masks(actual)
+    guess_masks = letter_position_masks(guesses)
+
+    green = xp.zeros((c, n), dtype=np.uint8)
+    for pos in range(length):
+        green |= (actual[:, pos][:, None] == guesses[:, pos][None, :]).astype(np.uint8) << pos
+    not_green = ~green
+
+    # A guessed letter that isn't green is yellow if the actual word has more
+    # non-green copies of it than there are non-green copies earlier in the
+    # guess, each of which will have claimed one as its own yellow.
+    codes = xp.zeros((c, n), dtype=np.uint8)
+    for pos in range(length):
+        letters = guesses[:, pos]
+        available = popcount(actual_masks[:, letters] & not_green)
+        earlier = popcount(guess_masks[xp.arange(n), letters] & not_green & np.uint8((1 << pos) - 1))
+        is_green = (green >> pos) & 1 == 1
+        yellow = ~is_green & (available > earlier)
+        codes *= 3
+        codes += xp.where(is_green, 0, xp.where(yellow, 1, 2)).astype(np.uint8)
+    return codes[0] if single else codes
+
+def build_hint_table_numpy(words) -> np.ndarray:
+    encoded = encode_words(words)
+    n = len(encoded)
+    table = np.empty((n, n), dtype=np.uint8)
+    for start in range(0, n, HINT_TABLE_CHUNK):
+        table[start:start + HINT_TABLE_CHUNK] = hint_codes(
+            encoded[start:start + HINT_TABLE_CHUNK], encoded)
+    return table
+
+def build_hint_table_gpu(words) -> np.ndarray:
+    """build_hint_table_numpy, run on the GPU with CuPy. Only the finished rows
+    are copied back to the host."""
+    encoded = cupy.asarray(encode_words(words))
+    n = len(encoded)
+    table = np.empty((n, n), dtype=np.uint8)
+    for start in range(0, n, HINT_TABLE_GPU_CHUNK):
+        table[start:start + HINT_TABLE_GPU_CHUNK] = hint_codes(
+            encoded[start:start + HINT_TABLE_GPU_CHUNK], encoded).get()
+    return table
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def hint_jit(words_u8, actual, guess, counts):
+        """Packed hint code for guessing words_u8[guess] when the answer is
+        words_u8[actual].
+
+        `counts` is a zeroed int8[26] scratch buffer, and is left zeroed on
+        return so callers can reuse it without reallocating per pair.
+        """
+        for i in range(5):
+            if words_u8[actual, i] != words_u8[guess, i]:
+                counts[words_u8[actual, i]] += 1
+        code = 0
+        for i in range(5):
+            code *= 3
+            if words_u8[actual, i] == words_u8[guess, i]:
+                pass
+            elif counts[words_u8[guess, i]] > 0:
+                counts[words_u8[guess, i]] -= 1
+                code += 1
+            else:
+                code += 2
+        for i in range(5):
+            counts[words_u8[actual, i]] = 0
+        return code
+
+    @numba.njit(parallel=True, cache=True)
+    def build_hint_matrix(words_u8):
+        n = words_u8.shape[0]
+        out = np.empty((n, n), np.uint8)
+        for actual in numba.prange(n):
+            counts = np.zeros(26, np.int8)
+            for guess in range(n):
+                out[actual, guess] = hint_jit(words_u8, actual, guess, counts)
+        return out
+
+# Expectations are kept as (numerator, denominator) pairs of ints rather than
+# Fractions, whose arithmetic reduces by gcd on every operation. The
+# denominator is the number of possibilities; the numerator is the total
+# number of guesses still needed across all of them, or math.inf.
+Expectation = Tuple[int, int]
+
+def expectation_less(a: Expectation, b: Expectation) -> bool:
+    return a[0] * b[1] < b[0] * a[1]
+
+def better_guess(expectation: Expectation, index: int, best_expectation: Optional[Expectation], best_index: Optional[int]) -> bool:
+    """Whether a guess beats the incumbent. Ties go to the lowest index so the
+    answer doesn't depend on the order guesses are evaluated in."""
+    return (best_expectation is None
+            or expectation_less(expectation, best_expectation)
+            or (not expectation_less(best_expectation, expectation) and index < best_index))
+
+MAX_GUESSES = 6
+
+def small_group_guesses(size: int, guesses_made) -> Optional[int]:
+    """Total guesses needed to finish off a hint group of one or two words, or
+    None if the group needs a search.
+
+    `guesses_made` is as passed to expected_guesses_after. Small groups only
+    skip the search when there's room left to make the guesses they take;
+    best_guess and expected_guesses_after each count one guess made.
+
+    >>> small_group_guesses(1, MAX_GUESSES - 2), small_group_guesses(1, MAX_GUESSES - 1)
+    (1, None)
+    >>> small_group_guesses(2, MAX_GUESSES - 4), small_group_guesses(2, MAX_GUESSES - 3)
+    (3, None)
+    >>> small_group_guesses(3, 0) is None
+    True
+    """
+    if size == 1 and guesses_made + 2 <= MAX_GUESSES:
+        # Guess the one word that's left.
+        return 1
+    if size == 2 and guesses_made + 4 <= MAX_GUESSES:
+        # Guess either word: it's right, or the other one is.
+        return 1 + 2
+    return None
+
+# How many of each state's best guesses a shallow search remembers for the
+# next, deeper one to try first.
+MOVE_ORDER_LENGTH = 4
+
+# Guesses for states with at least this many possibilities are ranked on the
+# GPU, when CuPy is installed.
+GPU_GUESS_ORDER_THRESHOLD = 1024
+
+# Only searches with more possibilities than this are spread across worker
+# processes; smaller ones don't make up for the startup and copying costs.
+PARALLEL_THRESHOLD = 64
+
+# A small dictionary for doctests. Most of the words differ in one letter, so
+# hint groups are big enough for searches to go a few guesses deep.
+DOCTEST_WORDS = ('bills', 'fills', 'hills', 'kills', 'mills', 'pills', 'sills', 'fight', 'bumps', 'shake')
+DOCTEST_POSSIBILITIES = np.arange(len(DOCTEST_WORDS), dtype=np.int32)
+
+def doctest_run(**kwargs) -> 'Run':
+    """A fresh Run, with nothing memoized, over DOCTEST_WORDS."""
+    return Run(DOCTEST_WORDS, build_hint_table(DOCTEST_WORDS), **kwargs)
 
 GuessWithExpectation = collections.namedtuple('GuessWithExpectation', ['guess', 'expected_after'])
 class Run:
-    def __init__(self, guessable_words, log_sink=None):
+    def __init__(self, guessable_words, hint_table, log_sink=None, workers=1):
         self._guessable_words = guessable_words
+        self._hint_table = hint_table
         self._log_sink = log_sink
+        # Checked before building log messages, so the search doesn't pay for
+        # them when nothing will be logged.
+        self._logging_enabled = log_sink is not None
+        self._workers = workers
         self._knowledge_states_seen = {}
         self._knowledge_states_visited = 0
+        # Guesses that give the same hints for every possibility have the same
+        # expectation, so expected_guesses_after is memoized on the hints
+        # rather than on the guess itself.
+        self._partitions_seen: Dict[Tuple[int, bytes, bytes], Expectation] = {}
+        # Set by best_guess_iterative: expected_guesses_after calls with more
+        # guesses made than this don't search further.
+        self._depth_limit: Optional[int] = None
+        self._move_order: Dict[Tuple[int, bytes], List[int]] = {}
+        # Device copy of the hint table, uploaded the first time it's needed.
+        self._hint_table_gpu = None
 
     def log(self, *args):
         if self._log_sink is None:
@@ -125,70 +491,340 @@ class Run:
             len(self._knowledge_states_seen) / self._knowledge_states_visited,
             *args)
 
-    def best_guess(self, possibilities: Tuple[str], guesses_made, stack=[]) -> GuessWithExpectation:
+    def best_guess(self, possibilities: np.ndarray, guesses_made, stack=[], root=True) -> GuessWithExpectation:
         self._knowledge_states_visited += 1
-        memoization_key = (guesses_made, possibilities)
-        if memoization_key not in self._knowledge_states_seen:
-            values = []
-            for i, guess in enumerate(self._guessable_words):
-                values.append(
-                    GuessWithExpectation(guess,
-                    self.expected_guesses_after(
-                        possibilities,
-                        guess,
-                        guesses_made+1,
-                        stack=stack + [len(possibilities), i+1, guess])),
-                )
-            best = min(
-                values,
-                key=lambda g: g.expected_after,
-            )
-            self.log(stack, 'best guess:', best.guess, float(best.expected_after))
-            self._knowledge_states_seen[memoization_key] = min(values, key=lambda g: g.expected_after)
-        return self._knowledge_states_seen[memoization_key]
-
-    def expected_guesses_after(self, possibilities: Tuple[str], guess, guesses_made, stack=[]) -> Fraction:
-        if guesses_made > 6:
-            return math.inf
-
-        remaining_guesses_distribution = collections.Counter()
-        hint_subpossibilities = possibilities_by_hint(possibilities, guess)
-        for hint_, sub_possibilities in hint_subpossibilities.items():
-            sub_possibilities = tuple(sub_possibilities)
-
-            sub_stack = stack + [brief_hint(hint_)]
-            self.log(sub_stack)
+        memoization_key = (guesses_made, possibilities_key(possibilities, len(self._hint_table)))
+        if memoization_key in self._knowledge_states_seen:
+            return self._knowledge_states_seen[memoization_key]
+
+        if len(possibilities) == 1 and guesses_made + 1 <= MAX_GUESSES:
+            # Nothing beats guessing the answer.
+            return GuessWithExpectation(self._guessable_words[possibilities[0]], (0, 1))
+
+        # Worker processes don't share the depth limit or move ordering, so
+        # shallow searches stay in this process.
+        if (self._workers > 1 and root and len(possibilities) > PARALLEL_THRESHOLD
+                and self._depth_limit is None):
+            best = self.best_guess_parallel(possibilities, guesses_made)
+        else:
+            # Trying promising guesses first tightens the bound that
+            # expected_guesses_after prunes against.
+            best = None
+            best_index = None
+            evaluated = []
+            for n, i in enumerate(self.guess_order(possibilities, memoization_key).tolist()):
+                guess = self._guessable_words[i]
+                expectation = self.expected_guesses_after(
+                    possibilities,
+                    i,
+                    guesses_made+1,
+                    best_so_far=(math.inf, 1) if best is None else best.expected_after,
+                    stack=stack + [len(possibilities), n+1, guess] if self._logging_enabled else stack)
+                if self._depth_limit is not None:
+                    evaluated.append((expectation[0] / expectation[1], i))
+                if better_guess(expectation, i, best and best.expected_after, best_index):
+                    best = GuessWithExpectation(guess, expectation)
+                    best_index = i
+            if evaluated:
+                evaluated.sort()
+                self._move_order[memoization_key] = [i for _, i in evaluated[:MOVE_ORDER_LENGTH]]
+        if self._logging_enabled:
+            self.log(stack, 'best guess:', best.guess, best.expected_after[0] / best.expected_after[1])
+        self._knowledge_states_seen[memoization_key] = best
+        return best
+
+    def guess_order(self, possibilities: np.ndarray, memoization_key) -> np.ndarray:
+        """Guesses to try, starting with the ones a shallower search liked."""
+        if cupy is not None and len(possibilities) >= GPU_GUESS_ORDER_THRESHOLD:
+            if self._hint_table_gpu is None:
+                self._hint_table_gpu = cupy.asarray(self._hint_table)
+            order = guess_order(self._hint_table_gpu, cupy.asarray(possibilities)).get()
+        else:
+            order = guess_order(self._hint_table, possibilities)
+        preferred = self._move_order.get(memoization_key)
+        if not preferred:
+            return order
+        return np.concatenate((preferred, order[~np.isin(order, preferred)]))
+
+    def best_guess_iterative(self, possibilities: np.ndarray, guesses_made, max_depth) -> GuessWithExpectation:
+        """best_guess, preceded by searches 1 to max_depth guesses deep.
+
+        A shallow search charges one more guess for every word left when it
+        hits its depth limit, which is a lower bound, so its results are only
+        used to order the guesses tried by the next search. The last search
+        has no limit and gives the exact answer.
+
+        >>> doctest_run().best_guess(DOCTEST_POSSIBILITIES, 0)
+        GuessWithExpectation(guess='bumps', expected_after=(13, 10))
+        >>> all(doctest_run().best_guess_iterative(DOCTEST_POSSIBILITIES, guesses_made, max_depth=2)
+        ...     == doctest_run().best_guess(DOCTEST_POSSIBILITIES, guesses_made)
+        ...     for guesses_made in range(3))
+        True
+        """
+        for depth in range(1, max_depth + 1):
+            # Each level of the search counts two guesses made; see
+            # expected_guesses_after.
+            self._depth_limit = guesses_made + 2 * depth - 1
+            self.best_guess(possibilities, guesses_made, stack=['depth', depth])
+            self._knowledge_states_seen.clear()
+            self._partitions_seen.clear()
+        self._depth_limit = None
+        return self.best_guess(possibilities, guesses_made)
+
+    def best_guess_tabled(self, possibilities: np.ndarray, guesses_made) -> GuessWithExpectation:
+        """best_guess, computed bottom-up instead of by recursive search.
+
+        Every state reachable from this one is enumerated first, then they're
+        solved in order of increasing size. A state's sub-states are always
+        smaller, so they're all memoized by the time it's solved and best_guess
+        never recurses. This gives up pruning: every reachable state is solved,
+        including ones the recursive search would have cut off.
+
+        >>> all(doctest_run().best_guess_tabled(DOCTEST_POSSIBILITIES, guesses_made)
+        ...     == doctest_run().best_guess(DOCTEST_POSSIBILITIES, guesses_made)
+        ...     for guesses_made in range(3))
+        True
+        """
+        n = len(self._hint_table)
+        states = {(guesses_made, possibilities_key(possibilities, n)): (guesses_made, possibilities)}
+        frontier = [(guesses_made, possibilities)]
+        while frontier:
+            state_guesses_made, state = frontier.pop()
+            if len(state) == 1 or state_guesses_made + 1 > MAX_GUESSES:
+                continue
+            for guess in range(len(self._guessable_words)):
+                groups = list(possibilities_by_hint(self._hint_table, state, guess))
+                # Guesses that don't split the state get no further.
+                if len(groups) == 1:
+                    continue
+                for hint_, sub_possibilities in groups:
+                    if (hint_ != ALL_GREEN
+                            and small_group_guesses(len(sub_possibilities), state_guesses_made + 1) is None):
+                        key = (state_guesses_made + 2, possibilities_key(sub_possibilities, n))
+                        if key not in states:
+                            states[key] = (state_guesses_made + 2, sub_possibilities)
+                            frontier.append(states[key])
+
+        for state_guesses_made, state in sorted(states.values(), key=lambda s: len(s[1])):
+            self.best_guess(state, state_guesses_made, root=False)
+        return self.best_guess(possibilities, guesses_made)
+
+    def best_guess_parallel(self, possibilities: np.ndarray, guesses_made) -> GuessWithExpectation:
+        """best_guess, with each candidate guess evaluated in a worker process.
+
+        The hint table is shared with the workers rather than pickled per task,
+        and so is the best expectation found so far, which they prune against.
+        The possibilities are sent to each worker once, so tasks are just a
+        guess.
+
+        best_guess only calls this for more than PARALLEL_THRESHOLD
+        possibilities, but it gives the same answer for any number. Starting
+        the pool is slow, so this check is skipped by the self-test at startup;
+        `python -m doctest wordle.py` runs it.
+
+        >>> __name__ == '__main__' or (
+        ...     doctest_run(workers=2).best_guess_parallel(DOCTEST_POSSIBILITIES, 0)
+        ...     == doctest_run().best_guess(DOCTEST_POSSIBILITIES, 0))
+        True
+        """
+        # Forking after Numba has started its thread pool can deadlock, so
+        # workers are spawned fresh.
+        context = multiprocessing.get_context('spawn')
+        table = self._hint_table
+        shm = shared_memory.SharedMemory(create=True, size=table.nbytes)
+        try:
+            np.ndarray(table.shape, dtype=table.dtype, buffer=shm.buf)[:] = table
+            best_so_far = context.Array('d', [math.inf, 1])
+            with ProcessPoolExecutor(
+                    self._workers,
+                    mp_context=context,
+                    initializer=init_worker,
+                    initargs=(shm.name, table.shape, self._guessable_words, best_so_far,
+                              possibilities.tobytes())) as pool:
+                memoization_key = (guesses_made, possibilities_key(possibilities, len(table)))
+                futures = {
+                    pool.submit(evaluate_guess, i, guesses_made+1): i
+                    for i in self.guess_order(possibilities, memoization_key).tolist()
+                }
+                best = None
+                best_index = None
+                for n, future in enumerate(as_completed(futures)):
+                    i = futures[future]
+                    expectation = future.result()
+                    if self._logging_enabled:
+                        self.log([len(possibilities), n+1, self._guessable_words[i]])
+                    if better_guess(expectation, i, best and best.expected_after, best_index):
+                        best = GuessWithExpectation(self._guessable_words[i], expectation)
+                        best_index = i
+        finally:
+            shm.close()
+            shm.unlink()
+        return best
+
+    def expected_guesses_after(self, possibilities: np.ndarray, guess: int, guesses_made, best_so_far=(math.inf, 1), stack=[]) -> Expectation:
+        """Expected number of guesses still needed after making `guess`.
+
+        Returns an infinite expectation as soon as the result is known to
+        exceed best_so_far, so callers should only rely on the exact value when
+        it's no worse.
+        """
+        if guesses_made > MAX_GUESSES:
+            return (math.inf, len(possibilities))
+
+        codes = self._hint_table[possibilities, guess]
+        memoization_key = (
+            guesses_made,
+            possibilities_key(possibilities, len(self._hint_table)),
+            codes.tobytes(),
+        )
+        if memoization_key in self._partitions_seen:
+            return self._partitions_seen[memoization_key]
+
+        # The all-green group (code 0) always comes first, so every word not yet
+        # accounted for needs at least one more guess. That gives a lower bound
+        # on the total to prune against.
+        numerator = 0
+        remaining = len(possibilities)
+        for hint_, sub_possibilities in possibilities_by_hint(self._hint_table, possibilities, guess, codes):
+            if self._logging_enabled:
+                sub_stack = stack + [brief_hint(hint_)]
+                self.log(sub_stack)
+            else:
+                sub_stack = stack
             assert len(sub_possibilities) > 0
 
             if hint_ == ALL_GREEN:
                 assert len(sub_possibilities) == 1
-                remaining_guesses_distribution[0] += 1
             else:
                 # This implies that you will learn absolutely nothing by
                 # making the guess. So, don't!
                 if len(sub_possibilities) == len(possibilities):
-                    return math.inf
-
-                g = self.best_guess(sub_possibilities, guesses_made+1, stack=sub_stack)
-                remaining_guesses_distribution[g.expected_after + 1] += len(sub_possibilities)
-
-        # Can't use inf as the numerator because it's not a valid Fraction.
-        numerator = sum(k * v for k, v in remaining_guesses_distribution.items())
-        if numerator == math.inf:
-            return math.inf
-
-        return Fraction(
-            numerator,
-            sum(remaining_guesses_distribution.values()),
-        )
-
-def possibilities_by_hint(possibilities, guess):
-    possibilities_by_hint = collections.defaultdict(list)
-    for actual in possibilities:
-        possibilities_by_hint[hint(actual, guess)].append(actual)
-    return possibilities_by_hint
-
-def parse_hint_piece(hint_piece: str) -> HintPiece:
+                    return (math.inf, len(possibilities))
+
+                small_group = small_group_guesses(len(sub_possibilities), guesses_made)
+                if small_group is not None:
+                    numerator += small_group
+                elif self._depth_limit is not None and guesses_made + 2 > self._depth_limit:
+                    numerator += len(sub_possibilities)
+                else:
+                    g = self.best_guess(sub_possibilities, guesses_made+1, stack=sub_stack, root=False)
+                    # The sub-expectation's denominator is len(sub_possibilities),
+                    # so adding one guess per word keeps this an integer.
+                    sub_numerator, sub_denominator = g.expected_after
+                    numerator += sub_numerator + sub_denominator
+            remaining -= len(sub_possibilities)
+
+            if (numerator + remaining) * best_so_far[1] > best_so_far[0] * len(possibilities):
+                return (math.inf, len(possibilities))
+
+        expectation = (numerator, len(possibilities))
+        self._partitions_seen[memoization_key] = expectation
+        return expectation
+
+# State for best_guess_parallel's worker processes, set up by init_worker.
+WORKER_SHM = None
+WORKER_RUN = None
+WORKER_BEST_SO_FAR = None
+WORKER_POSSIBILITIES = None
+
+def init_worker(shm_name, shape, guessable_words, best_so_far, possibilities_bytes):
+    global WORKER_SHM, WORKER_RUN, WORKER_BEST_SO_FAR, WORKER_POSSIBILITIES, cupy
+    # Workers rank guesses on the CPU, so they don't each upload their own
+    # copy of the hint table to the GPU.
+    cupy = None
+    WORKER_SHM = shared_memory.SharedMemory(name=shm_name)
+    hint_table = np.ndarray(shape, dtype=np.uint8, buffer=WORKER_SHM.buf)
+    WORKER_RUN = Run(guessable_words, hint_table)
+    WORKER_BEST_SO_FAR = best_so_far
+    WORKER_POSSIBILITIES = np.frombuffer(possibilities_bytes, dtype=np.int32)
+
+def evaluate_guess(guess: int, guesses_made) -> Expectation:
+    with WORKER_BEST_SO_FAR.get_lock():
+        best_so_far = tuple(WORKER_BEST_SO_FAR)
+    expectation = WORKER_RUN.expected_guesses_after(
+        WORKER_POSSIBILITIES, guess, guesses_made, best_so_far=best_so_far)
+    with WORKER_BEST_SO_FAR.get_lock():
+        if expectation_less(expectation, tuple(WORKER_BEST_SO_FAR)):
+            WORKER_BEST_SO_FAR[:] = expectation
+    return expectation
+
+# Caps the (possibilities x guesses) block of hint codes guess_order sorts at
+# once, so ranking guesses at the root doesn't need N * N scratch space.
+GUESS_ORDER_BLOCK = 1 << 22
+
+def guess_order(hint_table: np.ndarray, possibilities: np.ndarray) -> np.ndarray:
+    """Guess indices, highest entropy of the resulting hint first.
+
+    The entropy of a guess's partition into groups of sizes s is
+    log2(k) - sum(s * log2(s)) / k, so ranking by ascending sum(s * log2(s))
+    is the same thing and skips the division.
+
+    >>> table = build_hint_table(['abaci', 'bacon', 'xaaax', 'xxaaa'])
+    >>> guess_order(table, np.arange(4, dtype=np.int32)).tolist()
+    [1, 2, 3, 0]
+    """
+    xp = array_module(hint_table)
+    k = len(possibilities)
+    n = hint_table.shape[1]
+    block = max(1, GUESS_ORDER_BLOCK // k)
+    group_weight = xp.empty(n)
+    for start in range(0, n, block):
+        codes = xp.sort(hint_table[possibilities, start:start + block], axis=0)
+        b = codes.shape[1]
+        # Offset each guess's codes so one flat pass finds every group of
+        # equal hints, and no group spans two guesses.
+        keyed = (codes.T.astype(np.int32) + 243 * xp.arange(b, dtype=np.int32)[:, None]).ravel()
+        starts = xp.flatnonzero(xp.diff(keyed, prepend=-1))
+        sizes = xp.diff(starts, append=len(keyed))
+        group_weight[start:start + b] = xp.bincount(
+            starts // k, weights=sizes * xp.log2(sizes), minlength=b)
+    return xp.argsort(group_weight, kind='stable')
+
+def possibilities_key(possibilities: np.ndarray, n: int) -> bytes:
+    """Compact memo key for a sorted array of word indices below n.
+
+    Sets are keyed by their int32 indices or by a uint64 bitmask with a bit per
+    word, whichever is shorter. Bitmask keys are all exactly the mask's length
+    and index keys are always shorter, so the two kinds never collide.
+
+    >>> possibilities_key(np.array([1, 2], dtype=np.int32), 1000) == np.array([1, 2], dtype=np.int32).tobytes()
+    True
+    >>> possibilities_key(np.arange(64, dtype=np.int32), 128).hex()
+    'ffffffffffffffff0000000000000000'
+    """
+    mask_bytes = 8 * ((n + 63) // 64)
+    if 4 * len(possibilities) < mask_bytes:
+        return possibilities.tobytes()
+    mask = np.zeros(8 * mask_bytes, dtype=bool)
+    mask[possibilities] = True
+    return np.packbits(mask, bitorder='little').tobytes()
+
+def possibilities_by_hint(hint_table: np.ndarray, possibilities: np.ndarray, guess: int, codes: Optional[np.ndarray] = None):
+    """Groups the possible answers by the packed hint that guessing word index
+    `guess` would produce, returning (hint code, sub-possibilities) pairs in
+    increasing order of hint code.
+
+    `possibilities` is a sorted int32 array of indices into hint_table; each
+    group is a sorted view into one reordered copy of it, so its bytes make a
+    canonical memo key.
+
+    `codes` is hint_table[possibilities, guess], for callers that already have
+    it.
+
+    >>> table = build_hint_table(['abaci', 'bacon', 'xaaax', 'xxaaa'])
+    >>> [(code, group.tolist()) for code, group in
+    ...     possibilities_by_hint(table, np.arange(4, dtype=np.int32), 0)]
+    [(0, [0]), (131, [1]), (143, [2, 3])]
+    """
+    if codes is None:
+        codes = hint_table[possibilities, guess]
+    order = np.argsort(codes, kind='stable')
+    group_sizes = np.bincount(codes)
+    group_codes = np.flatnonzero(group_sizes)
+    split_points = np.cumsum(group_sizes[group_codes][:-1])
+    return zip(group_codes.tolist(), np.split(possibilities[order], split_points))
+
+def parse_hint_piece(hint_piece: str) -> int:
     if hint_piece == 'G':
         return GREEN
     elif hint_piece == 'Y':
@@ -198,14 +834,33 @@ def parse_hint_piece(hint_piece: str) -> HintPiece:
     else:
         raise ValueError('Unknown hint piece: {}'.format(hint_piece))
 
-def parse_hint(hintstr: str):
-    return tuple(map(parse_hint_piece, hintstr))
+def parse_hint(hintstr: str) -> int:
+    return encode_hint(map(parse_hint_piece, hintstr))
 
 def parse_hints(all_hints: str):
+    """Yields (word, packed hint) pairs from a --hints argument.
+
+    >>> list(parse_hints('bacon:RRRRY,grues:RGRRR'))
+    [('bacon', 241), ('grues', 188)]
+    >>> list(parse_hints('bacon:RRR'))
+    Traceback (most recent call last):
+        ...
+    ValueError: Hints must be 5 letters long: 'bacon:RRR'
+    >>> list(parse_hints('Bacon:RRRRY'))
+    Traceback (most recent call last):
+        ...
+    ValueError: Not a 5-letter word of a-z: 'Bacon'
+    """
     if all_hints == '':
         return
     for chunk in all_hints.split(','):
         word, hintstr = chunk.split(':')
+        if not (len(word) == 5 and is_lowercase_word(word)):
+            raise ValueError(f'Not a 5-letter word of a-z: {word!r}')
+        # Packed hints don't record their length, so a short one would read as
+        # a different hint with leading greens.
+        if len(hintstr) != 5:
+            raise ValueError(f'Hints must be 5 letters long: {chunk!r}')
         yield word, parse_hint(hintstr)
 
 class IntervalLogger:
@@ -224,22 +879,42 @@ if __name__ == '__main__':
     assert failures == 0
 
     args = parser.parse_args()
+    try:
+        hints = list(parse_hints(args.hints))
+    except ValueError as e:
+        print(e)
+        exit(1)
     WORDS = tuple(args.dictionary.read_text().splitlines())
     print(len(WORDS), 'words loaded from', args.dictionary)
 
-    possibilities = WORDS
-    hints = list(parse_hints(args.hints))
+    start = time.time()
+    HINT_TABLE = build_hint_table(WORDS)
+    print(f'Hint table built in {time.time() - start:.1f}s')
+    WORD_INDICES = {word: i for i, word in enumerate(WORDS)}
+
+    possibilities = np.arange(len(WORDS), dtype=np.int32)
     for word, hint_ in hints:
-        pbh = possibilities_by_hint(possibilities, word)
+        if word in WORD_INDICES:
+            codes = HINT_TABLE[possibilities, WORD_INDICES[word]]
+        else:
+            # The hint table only covers guesses from the dictionary.
+            codes = np.array([hint(WORDS[i], word) for i in possibilities], dtype=np.uint8)
+        pbh = dict(possibilities_by_hint(HINT_TABLE, possibilities, WORD_INDICES.get(word), codes))
         if hint_ not in pbh:
-            print('No possibilities after hint', hint_)
+            print('No possibilities after hint', decode_hint(hint_))
             exit(1)
         possibilities = pbh[hint_]
-        print(word, hint_, len(possibilities), 'possibilities remain')
+        print(word, decode_hint(hint_), len(possibilities), 'possibilities remain')
         if len(possibilities) < 10:
-            print('Possibilities:', sorted(possibilities))
+            print('Possibilities:', sorted(WORDS[i] for i in possibilities))
 
     logger = IntervalLogger(args.log_interval)
-    run = Run(guessable_words=WORDS, log_sink=logger.log)
-    best_guess = run.best_guess(tuple(possibilities), guesses_made=len(hints))
-    print(f'Best guess: "{best_guess.guess}", which should get the right answer in {float(best_guess.expected_after+1):.2f} guesses on average')
+    run = Run(guessable_words=WORDS, hint_table=HINT_TABLE, log_sink=logger.log, workers=args.workers)
+    if args.tabled:
+        best_guess = run.best_guess_tabled(possibilities, guesses_made=len(hints))
+    elif args.deepen:
+        best_guess = run.best_guess_iterative(possibilities, guesses_made=len(hints), max_depth=args.deepen)
+    else:
+        best_guess = run.best_guess(possibilities, guesses_made=len(hints))
+    numerator, denominator = best_guess.expected_after
+    print(f'Best guess: "{best_guess.guess}", which should get the right answer in {numerator / denominator + 1:.2f} guesses on average')